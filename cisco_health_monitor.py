@@ -4,22 +4,50 @@ Cisco 9300 Switch Health Monitor
 This script reads the YAML configuration and executes health checks on Cisco 9300 switches.
 
 Requirements:
-    pip install netmiko pyyaml textfsm pyats genie
+    pip install netmiko pyyaml orjson numpy zstandard textfsm pyats genie
 """
 
-import yaml
-import json
+import io
+import os
+import math
+import re
+import sys
+import pickle
+import shutil
+import hashlib
+import importlib
+import queue
+import tempfile
+import asyncio
+import contextlib
+import argparse
+import atexit
 import logging
-from datetime import datetime
-from typing import Dict, List, Any
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Tuple, Any, Optional
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 
 try:
-    from netmiko import ConnectHandler
-    from netmiko.exceptions import NetmikoTimeoutException, NetmikoAuthenticationException
+    import zstandard as zstd
 except ImportError:
-    print("Please install netmiko: pip install netmiko")
-    exit(1)
+    zstd = None
+
+# Output directories already created by this process
+_ENSURED_DIRS: set = set()
+
+# pip package names of lazily imported modules, where they differ
+_PIP_PACKAGES = {'yaml': 'pyyaml'}
+
+# Whether the missing-numpy warning has been logged
+_NUMPY_WARNED = False
+
+# First number in a parsed field, e.g. "45 Celsius" or "5%"
+_NUMBER_RE = re.compile(r'-?\d+(?:\.\d+)?')
 
 # Configure logging
 logging.basicConfig(
@@ -28,6 +56,319 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Netmiko (with paramiko, cryptography and textfsm) and PyYAML are slow to
+# import, so they are imported where first needed. These names stay available
+# as module attributes for existing callers.
+_LAZY_IMPORTS = {
+    'ConnectHandler': ('netmiko', 'ConnectHandler'),
+    'NetmikoTimeoutException': ('netmiko.exceptions', 'NetmikoTimeoutException'),
+    'NetmikoAuthenticationException': ('netmiko.exceptions', 'NetmikoAuthenticationException'),
+    'yaml': ('yaml', None),
+    'orjson': ('orjson', None),
+}
+
+
+def __getattr__(name: str):
+    if name in _LAZY_IMPORTS:
+        module_name, attr = _LAZY_IMPORTS[name]
+        value = importlib.import_module(module_name)
+        if attr:
+            value = getattr(value, attr)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+@dataclass
+class PooledConn:
+    """A Netmiko connection held by the connection pool"""
+    conn: Any
+    created: float = field(default_factory=time.monotonic)
+    last_used: float = field(default_factory=time.monotonic)
+
+
+class ConnectionPool:
+    """
+    Pool of live Netmiko connections keyed by device and credentials
+    
+    Reusing an open session skips the TCP/SSH handshake and Netmiko's session
+    preparation on subsequent poll cycles. Idle connections are closed by a
+    background sweep once unused for `idle_timeout` seconds or older than
+    `max_age` seconds, and all connections are closed at interpreter exit.
+    Once `close_all()` has run the pool is closed: `acquire()` raises and
+    released connections are closed instead of kept.
+    """
+    
+    def __init__(self, idle_timeout: float = 300, max_age: float = 3600,
+                 sweep_interval: float = 60):
+        self.idle_timeout = idle_timeout
+        self.max_age = max_age
+        self.sweep_interval = sweep_interval
+        self._idle: Dict[Tuple, List[PooledConn]] = {}
+        self._in_use: Dict[int, Tuple[Tuple, PooledConn]] = {}
+        self._lock = threading.RLock()
+        self._timer = None
+        self.closed = False
+    
+    @staticmethod
+    def _key(device_params: Dict) -> Tuple:
+        # Sessions are only shared by callers with the same credentials; they
+        # are hashed so secrets don't sit in the key itself
+        credentials = hashlib.blake2b(repr((
+            device_params.get('password'), device_params.get('secret'),
+            device_params.get('use_keys'), device_params.get('key_file')
+        )).encode(), digest_size=16).hexdigest()
+        return (device_params['host'], device_params['username'],
+                device_params['device_type'], credentials)
+    
+    def acquire(self, device_params: Dict):
+        """Return an idle live connection for the device, or open a new one"""
+        key = self._key(device_params)
+        
+        with self._lock:
+            if self.closed:
+                raise RuntimeError("Connection pool is closed")
+            self._start_sweeper()
+            idle = self._idle.get(key, [])
+            while idle:
+                entry = idle.pop()
+                if self._expired(entry, time.monotonic()) or not self._is_alive(entry.conn):
+                    self._close(entry)
+                    continue
+                entry.last_used = time.monotonic()
+                self._in_use[id(entry.conn)] = (key, entry)
+                logger.info(f"Reusing pooled connection to {key[0]}")
+                return entry.conn
+        
+        from netmiko import ConnectHandler
+        
+        # Connect outside the lock so slow handshakes don't block other devices
+        conn = ConnectHandler(**device_params)
+        with self._lock:
+            if self.closed:
+                self._close(PooledConn(conn))
+                raise RuntimeError("Connection pool is closed")
+            self._in_use[id(conn)] = (key, PooledConn(conn))
+        return conn
+    
+    def release(self, conn, close: bool = False):
+        """Return a connection to the pool for reuse, or close it if `close`"""
+        with self._lock:
+            key, entry = self._in_use.pop(id(conn), (None, None))
+            if entry is None or close or self.closed:
+                # Not ours or not wanted back, nothing to keep
+                self._close(entry or PooledConn(conn))
+                return
+            entry.last_used = time.monotonic()
+            self._idle.setdefault(key, []).append(entry)
+    
+    def close_all(self):
+        """Close every pooled connection, in use or idle, and stop the sweep"""
+        with self._lock:
+            self.closed = True
+            if self._timer:
+                self._timer.cancel()
+                self._timer = None
+            for entries in self._idle.values():
+                for entry in entries:
+                    self._close(entry)
+            self._idle.clear()
+            for _, entry in self._in_use.values():
+                self._close(entry)
+            self._in_use.clear()
+    
+    def _expired(self, entry: PooledConn, now: float) -> bool:
+        return (now - entry.last_used > self.idle_timeout or
+                now - entry.created > self.max_age)
+    
+    @staticmethod
+    def _is_alive(conn) -> bool:
+        try:
+            return conn.is_alive()
+        except Exception:
+            return False
+    
+    @staticmethod
+    def _close(entry: PooledConn):
+        try:
+            entry.conn.disconnect()
+        except Exception as e:
+            logger.debug(f"Error closing pooled connection: {str(e)}")
+    
+    def _start_sweeper(self):
+        if self._timer is None:
+            self._timer = threading.Timer(self.sweep_interval, self._sweep)
+            self._timer.daemon = True
+            self._timer.start()
+    
+    def _sweep(self):
+        """Close idle connections past their idle timeout or max age"""
+        with self._lock:
+            now = time.monotonic()
+            for key in list(self._idle):
+                keep = []
+                for entry in self._idle[key]:
+                    if self._expired(entry, now):
+                        logger.info(f"Closing idle pooled connection to {key[0]}")
+                        self._close(entry)
+                    else:
+                        keep.append(entry)
+                if keep:
+                    self._idle[key] = keep
+                else:
+                    del self._idle[key]
+            
+            self._timer = None
+            if self._idle or self._in_use:
+                self._start_sweeper()
+
+
+POOL = ConnectionPool()
+atexit.register(POOL.close_all)
+
+
+# Compiled TextFSM templates keyed by (platform, command); None if no template
+_TEMPLATES: Dict[Tuple[str, str], Optional[Tuple[str, ...]]] = {}
+_IDLE_FSMS: Dict[Tuple[str, str], List[List[Any]]] = {}
+_TEMPLATES_LOCK = threading.Lock()
+_CLI_TABLE = None
+
+
+def _get_template(platform: str, command: str) -> Optional[Tuple[str, ...]]:
+    """
+    Return the ntc-templates TextFSM template texts for a command
+    
+    The first lookup also compiles one set of parsers, so warming a command
+    at startup leaves a parser ready for its first parse.
+    """
+    key = (platform, command)
+    with _TEMPLATES_LOCK:
+        if key in _TEMPLATES:
+            return _TEMPLATES[key]
+        texts = _load_template(platform, command)
+        _TEMPLATES[key] = texts
+        _IDLE_FSMS[key] = []
+        if texts is not None:
+            fsms = _compile_fsms(command, texts)
+            if fsms is None:
+                _TEMPLATES[key] = texts = None
+            else:
+                _IDLE_FSMS[key].append(fsms)
+        return texts
+
+
+def _load_template(platform: str, command: str) -> Optional[Tuple[str, ...]]:
+    """Look up a command in the ntc-templates index and read its templates"""
+    global _CLI_TABLE
+    from textfsm import clitable
+    from netmiko.utilities import get_template_dir
+    
+    try:
+        template_dir = get_template_dir()
+        if _CLI_TABLE is None:
+            _CLI_TABLE = clitable.CliTable('index', template_dir)
+        
+        row = _CLI_TABLE.index.GetRowMatch({'Command': command, 'Platform': platform})
+        if not row:
+            logger.debug(f"No TextFSM template for '{command}' on {platform}")
+            return None
+        
+        # An index entry may list several templates separated by ':'
+        texts = []
+        for template_file in _CLI_TABLE.index.index[row]['Template'].split(':'):
+            with open(os.path.join(template_dir, template_file)) as f:
+                texts.append(f.read())
+        return tuple(texts)
+    except (OSError, ValueError, clitable.CliTableError) as e:
+        logger.warning(f"Could not load TextFSM template for '{command}': {str(e)}")
+        return None
+
+
+def _compile_fsms(command: str, texts: Tuple[str, ...]) -> Optional[List[Any]]:
+    """Compile one TextFSM parser per template text"""
+    import textfsm
+    
+    try:
+        return [textfsm.TextFSM(io.StringIO(text)) for text in texts]
+    except textfsm.TextFSMTemplateError as e:
+        logger.warning(f"Could not load TextFSM template for '{command}': {str(e)}")
+        return None
+
+
+def _parse_with(fsms: List[Any], output: str) -> Tuple[List[str], List[Dict]]:
+    """
+    Parse output with each template and merge the tables as CliTable does
+    
+    Columns from later templates are added to the rows of the first one,
+    matching rows on the first template's Key values, or by position if it
+    has none.
+    """
+    first = fsms[0]
+    first.Reset()
+    header = list(first.header)
+    rows = [dict(zip(header, record)) for record in first.ParseText(output)]
+    keys = first.GetValuesByAttrib('Key')
+    
+    for fsm in fsms[1:]:
+        fsm.Reset()
+        other = [dict(zip(fsm.header, record)) for record in fsm.ParseText(output)]
+        extend_with = [column for column in fsm.header if column not in header]
+        if not extend_with:
+            continue
+        header.extend(extend_with)
+        for row in rows:
+            row.update(dict.fromkeys(extend_with, ''))
+        
+        if keys:
+            for row in rows:
+                match = next((o for o in other if all(o[k] == row[k] for k in keys)), None)
+                if match is not None:
+                    row.update({column: match[column] for column in extend_with})
+        else:
+            for row, match in zip(rows, other):
+                row.update({column: match[column] for column in extend_with})
+    
+    return header, rows
+
+
+def parse_output(platform: str, command: str, output: str):
+    """
+    Parse command output with its cached TextFSM templates
+    
+    Returns a list of dicts with lowercase field names, or the raw output if
+    there is no template or nothing was parsed.
+    """
+    texts = _get_template(platform, command)
+    if texts is None:
+        return output
+    
+    import textfsm
+    
+    # TextFSM objects keep parse state, so each parse takes its own parsers
+    # from the idle list and only compiles new ones when all are in use
+    key = (platform, command)
+    with _TEMPLATES_LOCK:
+        idle = _IDLE_FSMS[key]
+        fsms = idle.pop() if idle else None
+    if fsms is None:
+        fsms = _compile_fsms(command, texts)
+        if fsms is None:
+            return output
+    
+    try:
+        header, rows = _parse_with(fsms, output)
+    except textfsm.TextFSMError as e:
+        logger.warning(f"Error parsing output of '{command}': {str(e)}")
+        return output
+    finally:
+        with _TEMPLATES_LOCK:
+            idle.append(fsms)
+    
+    if not rows:
+        return output
+    names = {name: name.lower() for name in header}
+    return [{names[name]: value for name, value in row.items()} for row in rows]
+
 
 class CiscoHealthMonitor:
     """Cisco 9300 Switch Health Monitoring Class"""
@@ -35,47 +376,157 @@ class CiscoHealthMonitor:
     def __init__(self, config_file: str = 'cisco_9300_health_check.yaml'):
         """Initialize the health monitor with YAML config"""
         self.config = self._load_config(config_file)
+        
+        # Index enabled checks once so disabled ones are never visited
+        self._enabled_checks = [
+            (name, check) for name, check in self.config['health_checks'].items()
+            if check.get('enabled')
+        ]
+        self._check_by_name = dict(self._enabled_checks)
+        
+        # Compile the TextFSM templates for parsed commands before connecting
+        platform = self.config['connection']['device_type']
+        for _, check in self._enabled_checks:
+            for cmd_config in check.get('commands', []):
+                if cmd_config.get('parse', False):
+                    _get_template(platform, cmd_config['command'])
+        
+        # Specialize a runner per check so the hot path does no config lookups
+        self._runners = {
+            name: self._build_runner(name, check) for name, check in self._enabled_checks
+        }
+        
         self.results = {}
         self.connection = None
+        self.connections = []
+        self.host = None
+        self._device_params = None
+        self._secret = None
+        self._prompts: Dict[int, str] = {}
+        self._sessions_lock = threading.Lock()
+        
+    @staticmethod
+    def _load_config(config_file: str) -> Dict:
+        """
+        Load YAML configuration file
         
-    def _load_config(self, config_file: str) -> Dict:
-        """Load YAML configuration file"""
+        The parsed config is cached as a pickle next to the YAML file, keyed by
+        a hash of its contents, so unchanged configs skip YAML parsing.
+        """
         try:
-            with open(config_file, 'r') as f:
-                config = yaml.safe_load(f)
-            logger.info(f"Configuration loaded from {config_file}")
-            return config
+            config_path = Path(config_file)
+            raw = config_path.read_bytes()
         except FileNotFoundError:
             logger.error(f"Config file {config_file} not found")
             raise
+        
+        digest = hashlib.blake2b(raw, digest_size=16).hexdigest()
+        cache_path = config_path.with_name(f"{config_path.name}.{digest}.pkl")
+        
+        try:
+            with open(cache_path, 'rb') as f:
+                if CiscoHealthMonitor._trusted_cache(os.fstat(f.fileno())):
+                    config = pickle.load(f)
+                    logger.info(f"Configuration loaded from {config_file} (cached)")
+                    return config
+                logger.warning(f"Ignoring config cache {cache_path}: not owned by "
+                               f"the current user or writable by others")
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            # Any unreadable or corrupt cache is treated as a miss
+            logger.debug(f"Ignoring config cache {cache_path}: {e}")
+        
+        import yaml
+        # Prefer the libyaml C loader, falling back to the pure-Python one
+        loader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+        
+        try:
+            config = yaml.load(raw, Loader=loader)
         except yaml.YAMLError as e:
             logger.error(f"Error parsing YAML: {e}")
             raise
+        
+        CiscoHealthMonitor._write_config_cache(config_path, cache_path, config)
+        logger.info(f"Configuration loaded from {config_file}")
+        return config
+    
+    @staticmethod
+    def _trusted_cache(st: os.stat_result) -> bool:
+        """Only unpickle caches owned by this user and not writable by others"""
+        if hasattr(os, 'getuid') and st.st_uid != os.getuid():
+            return False
+        return not st.st_mode & 0o022
+    
+    @staticmethod
+    def _write_config_cache(config_path: Path, cache_path: Path, config: Dict):
+        """Write the parsed config cache and remove caches of older versions"""
+        try:
+            with tempfile.NamedTemporaryFile('wb', dir=cache_path.parent,
+                                             suffix='.tmp', delete=False) as f:
+                pickle.dump(config, f, protocol=5)
+            os.replace(f.name, cache_path)
+            
+            for stale in config_path.parent.glob(f"{config_path.name}.*.pkl"):
+                if stale != cache_path:
+                    stale.unlink(missing_ok=True)
+        except OSError as e:
+            # Caching is best effort, e.g. the config directory may be read-only
+            logger.debug(f"Could not write config cache {cache_path}: {str(e)}")
     
-    def connect_to_device(self, host: str, username: str, password: str, 
+    def connect_to_device(self, host: str, username: str, password: str = None,
                           secret: str = None) -> bool:
-        """Establish connection to Cisco switch"""
+        """
+        Establish connection to Cisco switch
+        
+        With `auth.method: key` in the config, the SSH key in `auth.key_file` is
+        used and the password is only a fallback.
+        """
+        from netmiko.exceptions import NetmikoTimeoutException, NetmikoAuthenticationException
+        
+        conn_config = self.config['connection']
+        fast_cli = conn_config.get('fast_cli', True)
         device_params = {
-            'device_type': self.config['connection']['device_type'],
+            'device_type': conn_config['device_type'],
             'host': host,
             'username': username,
             'password': password,
-            'timeout': self.config['connection']['timeout'],
-            'global_delay_factor': self.config['connection']['global_delay_factor'],
+            'timeout': conn_config['timeout'],
+            'session_timeout': conn_config.get('session_timeout', 60),
+            # fast_cli drops Netmiko's conservative sleeps, so no extra delay by default
+            'fast_cli': fast_cli,
+            'global_delay_factor': conn_config.get('global_delay_factor', 1 if fast_cli else 2),
         }
         
+        auth = self.config.get('auth', {})
+        if auth.get('method') == 'key':
+            device_params['use_keys'] = True
+            if auth.get('key_file'):
+                device_params['key_file'] = os.path.expanduser(auth['key_file'])
+        
         if secret:
             device_params['secret'] = secret
         
         try:
             logger.info(f"Connecting to {host}...")
-            self.connection = ConnectHandler(**device_params)
+            self.connection = self._open_session(device_params, secret)
+            self.connections = [self.connection]
             
-            # Enter enable mode if secret is provided
-            if secret:
-                self.connection.enable()
+            # Extra sessions let checks run in parallel; stop at the device's limit
+            sessions = self.config['connection'].get('sessions', 1)
+            for _ in range(sessions - 1):
+                try:
+                    self.connections.append(self._open_session(device_params, secret))
+                except Exception as e:
+                    logger.warning(f"Could only open {len(self.connections)} "
+                                   f"sessions to {host}: {str(e)}")
+                    break
             
-            logger.info(f"Successfully connected to {host}")
+            self.host = host
+            self._device_params = device_params
+            self._secret = secret
+            logger.info(f"Successfully connected to {host} "
+                        f"({len(self.connections)} sessions)")
             return True
             
         except NetmikoTimeoutException:
@@ -88,169 +539,679 @@ class CiscoHealthMonitor:
             logger.error(f"Error connecting to {host}: {str(e)}")
             return False
     
+    @staticmethod
+    def _open_session(device_params: Dict, secret: str = None):
+        """Acquire a session from the pool, entering enable mode if needed"""
+        conn = POOL.acquire(device_params)
+        try:
+            # Enter enable mode if secret is provided
+            if secret and not conn.check_enable_mode():
+                conn.enable()
+        except Exception:
+            POOL.release(conn)
+            raise
+        return conn
+    
+    def _reopen_session(self):
+        """Open a replacement session to the connected device"""
+        if POOL.closed:
+            # Don't reconnect while the process is shutting down
+            raise RuntimeError("Connection pool is closed")
+        conn = self._open_session(self._device_params, self._secret)
+        with self._sessions_lock:
+            self.connections.append(conn)
+        return conn
+    
+    def _drop_session(self, conn):
+        """
+        Close a session whose channel is out of sync (e.g. after a failed batch)
+        
+        Unread output and prompts may still be in the channel, so the session
+        is closed rather than reused by later checks or the pool.
+        """
+        logger.warning(f"Closing session to {self.host} after a failed batch")
+        with self._sessions_lock:
+            if conn in self.connections:
+                self.connections.remove(conn)
+            self._prompts.pop(id(conn), None)
+        POOL.release(conn, close=True)
+    
     def execute_health_check(self, check_name: str) -> Dict:
         """Execute a specific health check"""
         if not self.connection:
             logger.error("No active connection to device")
             return {}
         
-        health_check = self.config['health_checks'].get(check_name)
-        if not health_check or not health_check.get('enabled'):
+        health_check = self._check_by_name.get(check_name)
+        if not health_check:
             logger.warning(f"Health check '{check_name}' not enabled or not found")
             return {}
         
-        logger.info(f"Executing {check_name} health check...")
-        check_results = {
-            'check_name': check_name,
-            'timestamp': datetime.now().isoformat(),
-            'commands': []
-        }
-        
-        for cmd_config in health_check.get('commands', []):
-            command = cmd_config['command']
-            description = cmd_config.get('description', '')
-            
+        result, ok = self._runners[check_name](self.connection)
+        if not ok:
+            self._drop_session(self.connection)
             try:
-                logger.info(f"Executing: {command}")
-                output = self.connection.send_command(
-                    command,
-                    use_textfsm=cmd_config.get('parse', False)
-                )
-                
-                check_results['commands'].append({
-                    'command': command,
-                    'description': description,
-                    'output': output,
-                    'status': 'success'
-                })
-                
+                self._reopen_session()
             except Exception as e:
-                logger.error(f"Error executing {command}: {str(e)}")
-                check_results['commands'].append({
-                    'command': command,
-                    'description': description,
-                    'error': str(e),
-                    'status': 'failed'
-                })
-        
-        return check_results
-    
-    def execute_all_health_checks(self) -> Dict:
-        """Execute all enabled health checks"""
+                logger.error(f"Could not reopen session to {self.host}: {str(e)}")
+            self.connection = self.connections[0] if self.connections else None
+        return result
+    
+    def _build_runner(self, check_name: str, health_check: Dict) -> Callable[[Any], Dict]:
+        """
+        Build the function that runs an enabled health check on a session
+        
+        The command list, descriptions and parse flags are resolved from the
+        config once here, so each run only sends the batch and assembles the
+        result. The runner returns the result and whether the batch succeeded;
+        passing `error` reports every command as failed without sending.
+        """
+        cmd_configs = health_check.get('commands', [])
+        commands = [cmd_config['command'] for cmd_config in cmd_configs]
+        specs = tuple(
+            (cmd_config['command'], cmd_config.get('description', ''),
+             cmd_config.get('parse', False))
+            for cmd_config in cmd_configs
+        )
+        platform = self.config['connection']['device_type']
+        commands_text = ', '.join(commands)
+        send_batch = self._send_batch
+        
+        def run(conn, error: str = None) -> Tuple[Dict, bool]:
+            logger.info(f"Executing {check_name} health check...")
+            timestamp = datetime.now(timezone.utc).isoformat()
+            
+            ok = error is None
+            if ok:
+                try:
+                    logger.info(f"Executing: {commands_text}")
+                    outputs = send_batch(conn, commands)
+                except Exception as e:
+                    logger.error(f"Error executing {check_name} commands: {str(e)}")
+                    error = str(e)
+            
+            if error is not None:
+                results = [
+                    {'command': command, 'description': description,
+                     'error': error, 'status': 'failed'}
+                    for command, description, _ in specs
+                ]
+            else:
+                results = []
+                for (command, description, parse), output in zip(specs, outputs):
+                    # A parse failure only fails its own command
+                    try:
+                        if parse:
+                            output = parse_output(platform, command, output)
+                    except Exception as e:
+                        logger.error(f"Error executing {command}: {str(e)}")
+                        results.append({'command': command, 'description': description,
+                                        'error': str(e), 'status': 'failed'})
+                        continue
+                    results.append({'command': command, 'description': description,
+                                    'output': output, 'status': 'success'})
+            
+            return {
+                'check_name': check_name,
+                'timestamp': timestamp,
+                'commands': results
+            }, error is None
+        
+        return run
+    
+    def _session_prompt(self, conn) -> str:
+        """Return the session's prompt, looked up once per session"""
+        prompt = self._prompts.get(id(conn))
+        if prompt is None:
+            prompt = conn.find_prompt()
+            self._prompts[id(conn)] = prompt
+        return prompt
+    
+    def _send_batch(self, conn, commands: List[str]) -> List[str]:
+        """
+        Send several commands in one write and split the combined output
+        
+        All commands are written to the channel at once and the output is read
+        back until the prompt has been seen once per command, so a check costs a
+        single round-trip instead of one per command. The device prompt is used
+        as the separator between command outputs.
+        """
+        from netmiko.exceptions import ReadTimeout
+        
+        if not commands:
+            return []
+        
+        prompt = self._session_prompt(conn)
+        conn.write_channel(conn.RETURN.join(commands) + conn.RETURN)
+        
+        # Count prompts in the new data only (plus a tail that could hold a
+        # prompt split across reads) rather than rescanning the whole buffer
+        read_timeout = self.config['connection']['timeout'] * len(commands)
+        deadline = time.monotonic() + read_timeout
+        tail_size = len(prompt) - 1
+        received = []
+        tail = ''
+        seen = 0
+        while seen < len(commands):
+            data = conn.read_channel()
+            if not data:
+                if POOL.closed:
+                    raise RuntimeError("Connection pool is closed")
+                if time.monotonic() > deadline:
+                    raise ReadTimeout(f"Saw {seen} of {len(commands)} prompts "
+                                      f"after {read_timeout}s")
+                time.sleep(0.01)
+                continue
+            received.append(data)
+            window = tail + data
+            seen += window.count(prompt)
+            tail = window[-tail_size:] if tail_size else ''
+        raw = ''.join(received)
+        
+        chunks = conn.normalize_linefeeds(raw).split(prompt)
+        
+        outputs = []
+        for command, chunk in zip(commands, chunks):
+            # Drop the echoed command line
+            lines = chunk.strip('\n').split('\n')
+            if lines and command in lines[0]:
+                lines = lines[1:]
+            outputs.append('\n'.join(lines).rstrip())
+        return outputs
+    
+    def execute_all_health_checks(self, output_dir: str = None) -> Dict:
+        """
+        Execute all enabled health checks
+        
+        Results are streamed to a newline-delimited JSON file as each check
+        completes: the first line holds the run metadata and each following
+        line one check result. Only a per-check summary is kept in memory. If
+        the file can't be created the checks still run, and `output_file` is
+        None.
+        """
+        import orjson
+        
         logger.info("Starting all health checks...")
         
         all_results = {
             'device_info': self.config['switch_info'],
-            'execution_time': datetime.now().isoformat(),
-            'checks': {}
+            'host': self.host,
+            'execution_time': datetime.now(timezone.utc).isoformat(),
+            'checks': {},
+            'alerts': [],
+            'output_file': None
         }
         
-        # Execute each health check
-        for check_name in self.config['health_checks'].keys():
-            result = self.execute_health_check(check_name)
-            if result:
-                all_results['checks'][check_name] = result
+        if not self.connection:
+            logger.error("No active connection to device")
+            self.results = all_results
+            return all_results
+        
+        try:
+            filepath = self._results_path(output_dir)
+            results_file = self._open_results_file(filepath)
+            all_results['output_file'] = str(filepath)
+        except OSError as e:
+            # Still run the checks so the summary and alerts are available
+            logger.error(f"Error saving results: {str(e)}")
+            results_file = contextlib.nullcontext()
+        
+        # Execute each enabled health check, one at a time per session
+        idle = queue.Queue()
+        for conn in self.connections:
+            idle.put(conn)
         
+        reopen_failed = []
+        
+        def run_check(check_name: str) -> Dict:
+            # A None slot is a session dropped after a failed batch
+            runner = self._runners[check_name]
+            conn = idle.get()
+            try:
+                if POOL.closed:
+                    # The process is shutting down, skip the remaining checks
+                    return runner(None, error="Connection pool is closed")[0]
+                if conn is None:
+                    if not reopen_failed:
+                        try:
+                            conn = self._reopen_session()
+                        except Exception as e:
+                            reopen_failed.append(f"No session to {self.host}: {str(e)}")
+                    if conn is None:
+                        return runner(None, error=reopen_failed[0])[0]
+                
+                result, ok = runner(conn)
+                if not ok:
+                    self._drop_session(conn)
+                    conn = None
+                return result
+            except BaseException:
+                if conn is not None:
+                    self._drop_session(conn)
+                    conn = None
+                raise
+            finally:
+                # Always hand the slot back so other checks can't starve
+                idle.put(conn)
+        
+        with results_file as f, \
+                ThreadPoolExecutor(max_workers=len(self.connections)) as executor:
+            if f is not None:
+                f.write(orjson.dumps({
+                    'device_info': all_results['device_info'],
+                    'host': all_results['host'],
+                    'execution_time': all_results['execution_time']
+                }) + b"\n")
+            
+            # Drop each future once written so only unwritten results stay in memory
+            futures = deque(
+                executor.submit(run_check, check_name)
+                for check_name, _ in self._enabled_checks
+            )
+            for check_name, health_check in self._enabled_checks:
+                result = futures.popleft().result()
+                if result:
+                    all_results['alerts'].extend(
+                        self._check_thresholds(check_name, health_check, result)
+                    )
+                    if f is not None:
+                        f.write(orjson.dumps(result) + b"\n")
+                    all_results['checks'][check_name] = {
+                        'timestamp': result['timestamp'],
+                        'commands': len(result['commands']),
+                        'failed': sum(1 for cmd in result['commands']
+                                      if cmd['status'] == 'failed')
+                    }
+        
+        self.connection = self.connections[0] if self.connections else None
         self.results = all_results
         return all_results
     
-    def save_results(self, output_dir: str = None) -> str:
-        """Save results to file"""
-        if not self.results:
-            logger.warning("No results to save")
-            return None
-        
+    def _results_path(self, output_dir: str = None) -> Path:
+        """Build the results file path, creating the output directory"""
         # Use configured output path or provided path
         output_config = self.config.get('output', {})
         if output_dir is None:
             output_dir = output_config.get('file_path', './output')
         
-        # Create output directory if it doesn't exist
-        Path(output_dir).mkdir(parents=True, exist_ok=True)
+        # Create output directory if it doesn't exist (once per process)
+        if output_dir not in _ENSURED_DIRS:
+            Path(output_dir).mkdir(parents=True, exist_ok=True)
+            _ENSURED_DIRS.add(output_dir)
         
-        # Generate filename with timestamp
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        filename = f"cisco9300_health_{timestamp}.json"
-        filepath = Path(output_dir) / filename
+        # Generate filename with host and timestamp so concurrent runs don't collide
+        timestamp = datetime.now(timezone.utc).strftime('%Y%m%d_%H%M%S')
+        if self.host:
+            filename = f"cisco9300_health_{self.host}_{timestamp}.ndjson"
+        else:
+            filename = f"cisco9300_health_{timestamp}.ndjson"
         
-        # Save results
-        try:
-            with open(filepath, 'w') as f:
-                json.dump(self.results, f, indent=2)
-            logger.info(f"Results saved to {filepath}")
-            return str(filepath)
-        except Exception as e:
-            logger.error(f"Error saving results: {str(e)}")
+        if output_config.get('compression') == 'zstd':
+            if zstd is not None:
+                filename += '.zst'
+            else:
+                logger.warning("zstandard not installed, saving results uncompressed "
+                               "(pip install zstandard)")
+        return Path(output_dir) / filename
+    
+    @staticmethod
+    def _open_results_file(filepath: Path):
+        """Open the results file for writing, zstd-compressed for .zst paths"""
+        f = open(filepath, 'wb')
+        if filepath.suffix == '.zst':
+            return zstd.ZstdCompressor(level=3, threads=-1).stream_writer(f)
+        return f
+    
+    def save_results(self, output_dir: str = None) -> str:
+        """
+        Return the results file written by execute_all_health_checks()
+        
+        Results are streamed to disk while the checks run; if `output_dir` is
+        given, the file is moved there.
+        """
+        if not self.results or not self.results.get('output_file'):
+            logger.warning("No results to save")
             return None
+        
+        filepath = Path(self.results['output_file'])
+        if output_dir is not None and Path(output_dir).resolve() != filepath.parent.resolve():
+            try:
+                Path(output_dir).mkdir(parents=True, exist_ok=True)
+                filepath = Path(shutil.move(str(filepath), str(Path(output_dir) / filepath.name)))
+                self.results['output_file'] = str(filepath)
+            except OSError as e:
+                logger.error(f"Error saving results: {str(e)}")
+                return None
+        
+        logger.info(f"Results saved to {filepath}")
+        return str(filepath)
     
-    def disconnect(self):
-        """Disconnect from device"""
-        if self.connection:
-            self.connection.disconnect()
-            logger.info("Disconnected from device")
+    def disconnect(self, close: bool = False):
+        """
+        Release the device sessions back to the pool
+        
+        Pooled sessions stay open for reuse until they go idle or the process
+        exits; pass `close=True` to log out of the switch immediately.
+        """
+        if self.connections:
+            for conn in self.connections:
+                POOL.release(conn, close=close)
+            self.connections = []
+            self.connection = None
+            logger.info("Closed device connection" if close else "Released device connection")
     
     def analyze_thresholds(self) -> Dict:
-        """Analyze results against configured thresholds"""
-        alerts = []
+        """Return the threshold alerts raised by execute_all_health_checks()"""
+        return {'alerts': self.results.get('alerts', [])}
+    
+    @staticmethod
+    def _check_thresholds(check_name: str, health_check: Dict, result: Dict) -> List[Dict]:
+        """
+        Compare a check's parsed fields against its warning/critical thresholds
+        
+        Each field listed in `threshold_fields` is gathered from every parsed
+        row into one NumPy column and compared in a single vectorized pass.
+        Thresholds where critical is below warning (e.g. fan RPM) alert on low
+        readings. Rows are labelled by the optional `threshold_key` field, and
+        repeated readings (e.g. the CPU totals on every process row) are
+        reported once. Threshold analysis is skipped if numpy is not installed.
+        """
+        global _NUMPY_WARNED
+        fields = health_check.get('threshold_fields')
+        if not fields:
+            return []
+        
+        try:
+            import numpy as np
+        except ImportError:
+            if not _NUMPY_WARNED:
+                _NUMPY_WARNED = True
+                logger.warning("numpy not installed, skipping threshold analysis "
+                               "(pip install numpy)")
+            return []
+        
+        warning = critical = None
+        for name, value in health_check.get('thresholds', {}).items():
+            if 'warning' in name:
+                warning = value
+            elif 'critical' in name:
+                critical = value
+        if warning is None and critical is None:
+            return []
         
-        # This is a placeholder for threshold analysis
-        # You would implement specific logic based on your monitoring needs
+        rows = [row for cmd in result['commands'] if isinstance(cmd.get('output'), list)
+                for row in cmd['output']]
+        if not rows:
+            return []
         
-        return {'alerts': alerts}
+        low_is_bad = warning is not None and critical is not None and critical < warning
+        missing = -np.inf if low_is_bad else np.inf
+        warning = missing if warning is None else warning
+        critical = missing if critical is None else critical
+        
+        key_field = health_check.get('threshold_key')
+        alerts = []
+        seen = set()
+        for field_name in fields:
+            values = np.array([_to_number(row.get(field_name)) for row in rows],
+                              dtype=np.float64)
+            if low_is_bad:
+                critical_mask = values <= critical
+                warning_mask = ~critical_mask & (values <= warning)
+            else:
+                critical_mask = values >= critical
+                warning_mask = ~critical_mask & (values >= warning)
+            
+            for severity, mask, threshold in (('critical', critical_mask, critical),
+                                              ('warning', warning_mask, warning)):
+                for index in np.flatnonzero(mask):
+                    value = float(values[index])
+                    key = rows[index].get(key_field) if key_field else None
+                    if (severity, field_name, key, value) in seen:
+                        continue
+                    seen.add((severity, field_name, key, value))
+                    
+                    label = f"{check_name} {key_field} {key}" if key else check_name
+                    alerts.append({
+                        'severity': severity,
+                        'check': check_name,
+                        'field': field_name,
+                        'key': key,
+                        'value': value,
+                        'threshold': threshold,
+                        'message': f"{severity.upper()}: {label} {field_name}={value:g} "
+                                   f"(threshold {threshold:g})"
+                    })
+        return alerts
 
 
-def main():
-    """
-    Main execution function
-    
-    Usage:
-        python cisco_health_monitor.py
-    
-    Environment Variables:
-        SWITCH_HOST: IP address or hostname of the switch
-        SWITCH_USER: Username for authentication
-        SWITCH_PASS: Password for authentication
-        SWITCH_SECRET: Enable secret (optional)
-    """
-    import os
-    
-    # Get connection details from environment variables or prompt
-    host = os.getenv('SWITCH_HOST') or input("Switch IP/Hostname: ")
-    username = os.getenv('SWITCH_USER') or input("Username: ")
-    password = os.getenv('SWITCH_PASS') or input("Password: ")
-    secret = os.getenv('SWITCH_SECRET') or input("Enable Secret (press Enter to skip): ")
-    
-    # Initialize monitor
-    monitor = CiscoHealthMonitor('cisco_9300_health_check.yaml')
-    
+def _to_number(value) -> float:
+    """Extract the numeric reading from a parsed field (NaN if there is none)"""
+    if isinstance(value, str):
+        match = _NUMBER_RE.search(value)
+        if match:
+            return float(match.group())
+    return math.nan
+
+
+def load_hosts(hosts_file: str) -> List[str]:
+    """Load switch hosts from a file, one per line ('#' starts a comment)"""
+    hosts = []
+    with open(hosts_file, 'r') as f:
+        for line in f:
+            host = line.split('#', 1)[0].strip()
+            if host:
+                hosts.append(host)
+    return hosts
+
+
+def _install_hint(error: ImportError) -> str:
+    """Install instructions for a dependency imported lazily"""
+    module = (error.name or 'netmiko').split('.')[0]
+    package = _PIP_PACKAGES.get(module, module)
+    return f"Please install {package}: pip install {package}"
+
+
+def run_device(host: str, username: str, password: str = None, secret: str = None,
+               config_file: str = 'cisco_9300_health_check.yaml') -> Optional[str]:
+    """Run all health checks against a single switch and return the results file"""
+    monitor = None
     try:
+        monitor = CiscoHealthMonitor(config_file)
+        
         # Connect to device
-        if not monitor.connect_to_device(host, username, password, secret or None):
-            logger.error("Failed to connect to device")
-            return
+        if not monitor.connect_to_device(host, username, password, secret):
+            logger.error(f"Failed to connect to {host}")
+            return None
         
         # Execute all health checks
-        results = monitor.execute_all_health_checks()
+        monitor.execute_all_health_checks()
+        if POOL.closed:
+            logger.error(f"Health check on {host} interrupted")
+            return None
         
         # Save results
         output_file = monitor.save_results()
         if output_file:
-            print(f"\nHealth check completed. Results saved to: {output_file}")
+            print(f"\n[{host}] Health check completed. Results saved to: {output_file}")
         
         # Analyze thresholds
         analysis = monitor.analyze_thresholds()
         if analysis.get('alerts'):
-            print("\nAlerts detected:")
+            print(f"\n[{host}] Alerts detected:")
             for alert in analysis['alerts']:
-                print(f"  - {alert}")
+                print(f"  - {alert['message']}")
         
-    except KeyboardInterrupt:
-        logger.info("Health check interrupted by user")
+        return output_file
+        
+    except ImportError as e:
+        logger.error(f"[{host}] {_install_hint(e)}")
+        return None
     except Exception as e:
-        logger.error(f"Error during health check: {str(e)}")
+        logger.error(f"Error during health check on {host}: {str(e)}")
+        return None
     finally:
         # Disconnect
-        monitor.disconnect()
+        if monitor:
+            monitor.disconnect()
+
+
+async def tcp_ping(host: str, port: int = 22, timeout: float = 1.0) -> bool:
+    """Check that a TCP connection to host:port can be opened within timeout"""
+    try:
+        _, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+    except (OSError, asyncio.TimeoutError):
+        return False
+    
+    writer.close()
+    try:
+        await writer.wait_closed()
+    except OSError:
+        pass
+    return True
+
+
+async def run_fleet(hosts: List[str], username: str, password: str = None,
+                    secret: str = None,
+                    config_file: str = 'cisco_9300_health_check.yaml',
+                    concurrency: int = 50, port: int = 22,
+                    preflight_timeout: float = 1.0) -> Dict[str, Optional[str]]:
+    """
+    Run health checks against many switches concurrently
+    
+    All switches are first probed with a TCP connect to the SSH port, so
+    unreachable ones are skipped after `preflight_timeout` seconds instead of
+    the full SSH timeout (a timeout of 0 disables the probe). Each reachable
+    device is then polled on its own worker thread (Netmiko is blocking), with
+    at most `concurrency` devices in flight at once.
+    
+    Returns:
+        Mapping of host to results file (None if the device failed)
+    """
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(concurrency)
+    
+    async def preflight(host: str) -> bool:
+        async with semaphore:
+            return await tcp_ping(host, port, preflight_timeout)
+    
+    if preflight_timeout > 0:
+        reachable = await asyncio.gather(*[preflight(host) for host in hosts])
+        for host, ok in zip(hosts, reachable):
+            if not ok:
+                logger.error(f"{host} is not reachable on port {port}, skipping")
+    else:
+        reachable = [True] * len(hosts)
+    
+    # The executor's worker count is what bounds the number of devices in flight
+    executor = ThreadPoolExecutor(max_workers=concurrency)
+    
+    async def run_one(host: str, ok: bool) -> Optional[str]:
+        if not ok:
+            return None
+        return await loop.run_in_executor(
+            executor, run_device, host, username, password, secret, config_file
+        )
+    
+    try:
+        output_files = await asyncio.gather(
+            *[run_one(host, ok) for host, ok in zip(hosts, reachable)]
+        )
+    except asyncio.CancelledError:
+        # Don't wait for in-flight devices when interrupted
+        executor.shutdown(wait=False, cancel_futures=True)
+        raise
+    executor.shutdown()
+    
+    return dict(zip(hosts, output_files))
+
+
+def main():
+    """
+    Main execution function
+    
+    Usage:
+        python cisco_health_monitor.py [--hosts hosts.txt] [--concurrency 50]
+                                       [--preflight-timeout 1.0]
+    
+    Switches are read from the hosts file, SWITCH_HOSTS/SWITCH_HOST, or the
+    `devices` list in the config, in that order. Nothing is prompted for, so
+    the script can run unattended.
+    
+    Environment Variables:
+        SWITCH_HOSTS: Comma-separated switch IPs/hostnames (if no hosts file)
+        SWITCH_HOST: IP address or hostname of a single switch
+        SWITCH_USER: Username for authentication (default: auth.username)
+        SWITCH_PASS: Password (required unless auth.method is key)
+        SWITCH_SECRET: Enable secret (optional)
+    """
+    parser = argparse.ArgumentParser(description='Cisco 9300 Switch Health Monitor')
+    parser.add_argument('--hosts', help='File with one switch IP/hostname per line')
+    parser.add_argument('--config', default='cisco_9300_health_check.yaml',
+                        help='Health check YAML configuration')
+    parser.add_argument('--concurrency', type=int, default=50,
+                        help='Maximum number of switches polled at once')
+    parser.add_argument('--preflight-timeout', type=float, default=1.0,
+                        help='Seconds to wait for the SSH port before skipping a '
+                             'switch (0 disables the check)')
+    args = parser.parse_args()
+    
+    try:
+        config = CiscoHealthMonitor._load_config(args.config)
+    except ImportError as e:
+        print(_install_hint(e))
+        exit(1)
+    auth = config.get('auth', {})
+    
+    # Get switches from the hosts file, environment variables or config
+    if args.hosts:
+        hosts = load_hosts(args.hosts)
+    else:
+        hosts = [h.strip() for h in os.getenv('SWITCH_HOSTS', '').split(',') if h.strip()]
+        if not hosts and os.getenv('SWITCH_HOST'):
+            hosts = [os.getenv('SWITCH_HOST')]
+        if not hosts:
+            hosts = [str(host) for host in config.get('devices') or []]
+    
+    if not hosts:
+        logger.error("No switches given: use --hosts, set SWITCH_HOSTS/SWITCH_HOST "
+                     "or list devices in the config")
+        return
+    
+    # Credentials are shared by every switch
+    username = os.getenv('SWITCH_USER') or auth.get('username')
+    password = os.getenv('SWITCH_PASS')
+    secret = os.getenv('SWITCH_SECRET')
+    
+    if not username:
+        logger.error("No username given: set SWITCH_USER or auth.username")
+        return
+    if not password and auth.get('method') != 'key':
+        logger.error("No password given: set SWITCH_PASS or use auth.method: key")
+        return
+    
+    # Use the libuv-based event loop where available
+    if sys.platform != 'win32':
+        try:
+            import uvloop
+            asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+        except ImportError:
+            pass
+    
+    try:
+        results = asyncio.run(run_fleet(hosts, username, password, secret,
+                                        args.config, args.concurrency,
+                                        preflight_timeout=args.preflight_timeout))
+    except KeyboardInterrupt:
+        logger.info("Health check interrupted by user")
+        return
+    finally:
+        POOL.close_all()
+    
+    failed = [host for host, output_file in results.items() if not output_file]
+    logger.info(f"Completed health checks on {len(hosts) - len(failed)}/{len(hosts)} switches")
+    if failed:
+        logger.error(f"Failed switches: {', '.join(failed)}")
 
 
 if __name__ == '__main__':